@@ -0,0 +1,214 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data.compactBars import PRICE_COLUMNS, widenPrices
+from data.optionsSymbol import optionSymbol
+from strategies.indicators import calculateIndicators
+import config
+
+try:
+    import strategies.signal as signal_module
+except ModuleNotFoundError as e:
+    # Only a missing signal.py falls back, errors inside it are raised
+    if e.name != "strategies.signal":
+        raise
+    signal_module = None
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def loadBars(path):
+    """1-minute bars from a CSV or parquet file with a Datetime column (or index) and OHLCV columns."""
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+
+    # Frames saved from candleHist/candleRange keep Datetime as the index
+    if isinstance(df.index, pd.DatetimeIndex) or df.index.name in ('Datetime', 'Timestamp', 'timestamp'):
+        df = df.reset_index()
+
+    df = df.rename(columns={col: col.capitalize() for col in df.columns})
+    df = df.rename(columns={'Timestamp': 'Datetime'})
+    # Offsets change across DST, so timezone-aware values are parsed as UTC; naive values are New York
+    # time and integers are COMPACT_MODE nanoseconds (UTC)
+    if pd.api.types.is_integer_dtype(df['Datetime']):
+        index = pd.DatetimeIndex(pd.to_datetime(df['Datetime'], unit='ns', utc=True), name='Datetime').tz_convert("America/New_York")
+    elif pd.to_datetime(df['Datetime'].iloc[:1]).dt.tz is None:
+        index = pd.DatetimeIndex(pd.to_datetime(df['Datetime']), name='Datetime').tz_localize("America/New_York")
+    else:
+        index = pd.DatetimeIndex(pd.to_datetime(df['Datetime'], utc=True), name='Datetime').tz_convert("America/New_York")
+
+    df = df[COLUMNS].set_index(index).sort_index()
+    for col in PRICE_COLUMNS:
+        if df[col].dtype == np.float32:
+            df[col] = widenPrices(df[col])
+    df[COLUMNS] = df[COLUMNS].astype(np.float64).ffill()
+    return df
+
+
+def lookbackSignal(indicator_df, lookback):
+    """Default vectorized signal: 1 (call) when every indicator was long on at least one of the
+    last `lookback` bars, -1 (put) when every indicator was short, 0 otherwise.
+
+    Define `calculateSignals(indicator_df, lookback)` in strategies/signal.py returning one
+    value per bar to backtest your own rule instead.
+    """
+    signals = indicator_df[[col for col in indicator_df.columns if col.endswith("_SIGNAL")]]
+    window = signals.rolling(lookback, min_periods=1)
+
+    long = (window.max() == 1).all(axis=1)
+    short = (window.min() == -1).all(axis=1)
+
+    return pd.Series(np.where(long & ~short, 1, np.where(short & ~long, -1, 0)), index=indicator_df.index)
+
+
+def signalRule(default_rule=False):
+    """(name, signal_fn) used by the backtest.
+
+    `calculateSignals(indicator_df, lookback)` from strategies/signal.py when it is defined.
+    The live bot's `calculateSignal` returns a single value for the last bar and cannot be run
+    over a whole session, so a signal.py with only `calculateSignal` is refused unless
+    `default_rule` asks for `lookbackSignal` instead, which is not that strategy.
+    """
+    calculate_signals = getattr(signal_module, "calculateSignals", None)
+    if calculate_signals is not None:
+        return "calculateSignals (strategies/signal.py)", calculate_signals
+
+    if hasattr(signal_module, "calculateSignal") and not default_rule:
+        raise ValueError(
+            "strategies/signal.py defines calculateSignal but not calculateSignals. "
+            "Add calculateSignals(indicator_df, lookback) returning one value per bar to backtest your strategy, "
+            "or pass --default-rule to backtest lookbackSignal, which is NOT your calculateSignal"
+        )
+
+    return "lookbackSignal (default rule, not strategies/signal.py)", lookbackSignal
+
+
+def _sessionSignals(bars, lookback, signal_fn):
+    """Indicators and signals for every bar, computed once per session.
+
+    Every indicator only looks backwards, so a bar's value here is the same as the one the live
+    loop computes when that bar arrives, without recomputing the whole history each minute.
+    """
+    sessions = []
+    for _, session in bars.groupby(bars.index.date, sort=True):
+        indicator_df = calculateIndicators(session)
+        indicator_df["SIGNAL"] = np.asarray(signal_fn(indicator_df, lookback), dtype=np.int64)
+        sessions.append(indicator_df)
+    return pd.concat(sessions)
+
+
+def _entries(indicator_df, hold_bars, cooldown):
+    """Bars where a trade would be entered, with the contract and the underlying's move after `hold_bars`."""
+    close = indicator_df["Close"]
+    session = pd.Series(indicator_df.index.date, index=indicator_df.index)
+    future = close.groupby(session).shift(-hold_bars)
+    move = (future / close - 1) * indicator_df["SIGNAL"]
+
+    candidates = indicator_df.index[indicator_df["SIGNAL"].to_numpy() != 0]
+
+    # Only one position at a time: a trade can be held up to TIME_LIMIT seconds
+    if cooldown:
+        taken = []
+        next_allowed = None
+        for ts in candidates:
+            if next_allowed is None or ts >= next_allowed:
+                taken.append(ts)
+                next_allowed = ts + pd.Timedelta(seconds=config.TIME_LIMIT)
+        candidates = pd.DatetimeIndex(taken, name=indicator_df.index.name)
+
+    signal = indicator_df.loc[candidates, "SIGNAL"]
+    entry_close = close.loc[candidates]
+
+    return pd.DataFrame({
+        "Side": np.where(signal == 1, "CALL", "PUT"),
+        "Close": entry_close,
+        "Contract": [optionSymbol(s, c, ts) for ts, s, c in zip(candidates, signal, entry_close)],
+        "Move": move.loc[candidates]
+    }, index=candidates)
+
+
+def backtest(bars, lookback=None, signal_fn=None, cooldown=True, default_rule=False):
+    """Run the signal pipeline over many sessions of 1-minute bars at once.
+
+    `signal_fn` defaults to `signalRule(default_rule)`. Returns (indicator_df, entries, summary).
+    """
+    start = time.perf_counter()
+
+    lookback = lookback or config.INDICATOR_LOOKBACK
+    if signal_fn is None:
+        rule, signal_fn = signalRule(default_rule)
+    else:
+        rule = getattr(signal_fn, "__name__", repr(signal_fn))
+    print(f"Signal rule: {rule}")
+    hold_bars = max(1, config.TIME_LIMIT // 60)
+
+    indicator_df = _sessionSignals(bars, lookback, signal_fn)
+    entries = _entries(indicator_df, hold_bars, cooldown)
+
+    moves = entries["Move"].dropna()
+    sessions = len(np.unique(indicator_df.index.date))
+    summary = {
+        "rule": rule,
+        "sessions": sessions,
+        "bars": len(indicator_df),
+        "entries": len(entries),
+        "calls": int((entries["Side"] == "CALL").sum()),
+        "puts": int((entries["Side"] == "PUT").sum()),
+        "entries_per_session": len(entries) / sessions if sessions else 0.0,
+        "hold_minutes": hold_bars,
+        "hit_rate": float((moves > 0).mean()) if len(moves) else float("nan"),
+        "mean_move_bp": float(moves.mean() * 10_000) if len(moves) else float("nan"),
+        "seconds": time.perf_counter() - start
+    }
+
+    return indicator_df, entries, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized signal backtest over historical 1-minute bars")
+    parser.add_argument("--symbol", default=config.SYMBOL)
+    parser.add_argument("--start", help="First session (YYYY-MM-DD), bars fetched with candleRange")
+    parser.add_argument("--end", help="Last session (YYYY-MM-DD), defaults to --start")
+    parser.add_argument("--file", help="Local CSV/parquet of 1-minute bars instead of the API")
+    parser.add_argument("--lookback", type=int, default=config.INDICATOR_LOOKBACK)
+    parser.add_argument("--no-cooldown", action="store_true", help="Keep signals that fire while a trade would still be open")
+    parser.add_argument("--out", help="Write the entries to this CSV")
+    parser.add_argument("--default-rule", action="store_true", help="Use lookbackSignal when strategies/signal.py has no calculateSignals")
+    args = parser.parse_args()
+
+    # Refuse before fetching any bars
+    try:
+        signalRule(args.default_rule)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.file:
+        bars = loadBars(args.file)
+    elif args.start:
+        from data.tickerInfo import candleRange
+        bars = candleRange(args.symbol, args.start, args.end or args.start)
+    else:
+        parser.error("either --file or --start is required")
+
+    if bars is None or bars.empty:
+        print(f"No data returned for {args.symbol}")
+        return
+
+    _, entries, summary = backtest(bars, args.lookback, cooldown=not args.no_cooldown, default_rule=args.default_rule)
+
+    print(entries.to_string())
+    print("=" * 60)
+    for key, value in summary.items():
+        print(f"{key:<20} {value:.4f}" if isinstance(value, float) else f"{key:<20} {value}")
+
+    if args.out:
+        entries.to_csv(args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from broker.order import sell
+import config
+
+class ExitQueue:
+    """Non-blocking outbound queue for exit orders.
+
+    `submit()` only enqueues, so the quote loop never waits on HTTP. Worker tasks hand each
+    exit to a thread pool sharing one pooled requests.Session, retry with backoff under the
+    same idempotency key, and report the result through `on_result(intent, ok)` back on the
+    event loop.
+    """
+
+    def __init__(self, on_result=None, workers=None):
+        self.on_result = on_result
+        self.workers = workers or config.EXIT_WORKERS
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="exit")
+        self.session = requests.Session()
+        self.tasks = []
+        self.send_latencies = []
+        self.confirm_latencies = []
+
+    def start(self):
+        if not self.tasks:
+            self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout=None):
+        """Wait for queued exits to be sent (up to drain_timeout seconds), then stop the workers."""
+        if drain_timeout is None:
+            drain_timeout = config.EXIT_TIMEOUT * config.EXIT_RETRIES
+        try:
+            await asyncio.wait_for(self.queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"{self.queue.qsize()} exit orders still queued at shutdown")
+
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+    def submit(self, symbol, portion, reason, price):
+        intent = {
+            'key': str(uuid.uuid4()),
+            'symbol': symbol,
+            'portion': portion,
+            'reason': reason,
+            'price': price,
+            'decided_at': time.perf_counter(),
+            'attempts': 0
+        }
+        self.queue.put_nowait(intent)
+        return intent
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            intent = await self.queue.get()
+            try:
+                ok = await self._send(loop, intent)
+                if self.on_result:
+                    self.on_result(intent, ok)
+            except Exception as e:
+                print(f"Exit worker error for {intent['symbol']}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _send(self, loop, intent):
+        backoff = config.EXIT_RETRY_BACKOFF
+        for attempt in range(1, config.EXIT_RETRIES + 1):
+            intent['attempts'] = attempt
+            if attempt == 1:
+                intent['sent_at'] = time.perf_counter()
+                self.send_latencies.append(intent['sent_at'] - intent['decided_at'])
+            try:
+                await loop.run_in_executor(
+                    self.executor, sell,
+                    intent['symbol'], intent['portion'], intent['reason'], intent['price'], intent['key'], self.session
+                )
+                intent['confirmed_at'] = time.perf_counter()
+                self.confirm_latencies.append(intent['confirmed_at'] - intent['decided_at'])
+                return True
+            except Exception as e:
+                print(f"Exit {intent['reason']} for {intent['symbol']} failed (attempt {attempt}/{config.EXIT_RETRIES}): {e}")
+                if attempt < config.EXIT_RETRIES:
+                    await asyncio.sleep(backoff)
+                    backoff *= 2
+        return False
+
+    def latency_stats(self):
+        """Decision-to-send and decision-to-confirmation latency in milliseconds."""
+        stats = {}
+        for name, values in (('send', self.send_latencies), ('confirm', self.confirm_latencies)):
+            if not values:
+                continue
+            ms = np.array(values) * 1000
+            stats[name] = {
+                'count': len(ms),
+                'mean': float(ms.mean()),
+                'p50': float(np.percentile(ms, 50)),
+                'p99': float(np.percentile(ms, 99)),
+                'max': float(ms.max())
+            }
+        return stats
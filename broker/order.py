@@ -2,6 +2,22 @@ import requests
 import config
 
 def buy_call():
-    return requests.post(config.CALL_WEBHOOK).text
+    return requests.post(config.CALL_WEBHOOK, timeout=config.ORDER_TIMEOUT).text
 def buy_put():
-    return requests.post(config.PUT_WEBHOOK).text
+    return requests.post(config.PUT_WEBHOOK, timeout=config.ORDER_TIMEOUT).text
+
+def sell(symbol, portion, reason, price, idempotency_key, session=requests):
+    """Send an exit for `portion` (0-1) of the position. Retries reuse the same idempotency key."""
+    response = session.post(
+        config.EXIT_WEBHOOK,
+        json={
+            "symbol": symbol,
+            "portion": portion,
+            "reason": reason,
+            "price": price
+        },
+        headers={"Idempotency-Key": idempotency_key},
+        timeout=config.EXIT_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.text
@@ -12,6 +12,7 @@ OPTIONS_URL = "wss://stream.data.alpaca.markets/v1beta1/indicative"
 # Bot webhook URL
 CALL_WEBHOOK = os.getenv("CALL_WEBHOOK")
 PUT_WEBHOOK = os.getenv("PUT_WEBHOOK")
+EXIT_WEBHOOK = os.getenv("EXIT_WEBHOOK")  # Exits are only logged when not set
 # ========= PARAMETERS ========= #
 
 # DATA PARAMETERS
@@ -19,6 +20,25 @@ SYMBOL = "SPY"
 START = "T09:30:00-05:00"
 END = "T15:59:00-05:00"
 INDICATOR_LOOKBACK = 3
+AGGREGATE_TIMEFRAMES = [3, 5, 15]  # Higher timeframes (minutes) built from the 1-minute bars
+COMPACT_MODE = False               # float32 bars, int8 signals and an int64 nanosecond index
+
+# PROCESS LAYOUT
+MULTIPROCESS = False      # Run ingestion/exits and the signal pipeline in separate processes
+INGESTION_CPU = 0         # Core for the websocket/exit process (None to leave unpinned)
+STRATEGY_CPU = 1          # Core for the minute signal process (None to leave unpinned)
+BAR_BUFFER_SIZE = 4096    # 1-minute bars kept in shared memory
+QUOTE_SLOTS = 16          # Option symbols in the shared latest-quote table
+INTENT_QUEUE_SIZE = 64    # Pending order intents from the strategy process
+
+# PROFILING (also toggled at runtime with SIGUSR1)
+PROFILE = os.getenv("PROFILE") == "1"
+PROFILE_DIR = "profiles"            # One sub-directory per run
+PROFILE_SAMPLE_INTERVAL = 0.005     # Seconds between CPU stack samples
+PROFILE_LAG_INTERVAL = 0.1          # Seconds between event loop lag probes
+PROFILE_SNAPSHOT_INTERVAL = 300     # Seconds between tracemalloc snapshots / file dumps
+PROFILE_TRACE_FRAMES = 5            # Stack depth kept by tracemalloc
+PROFILE_TOP_STATS = 25              # Lines per memory diff
 
 # EMA PARAMETERS
 EMA_SHORT_PERIOD = 5
@@ -57,3 +77,10 @@ HARD_SL = 0.20           # % hard stop loss before TP1
 
 # Time parameters
 TIME_LIMIT = 420         # Seconds to hold position before exiting
+
+# Order sending
+ORDER_TIMEOUT = 5         # Seconds per entry webhook request
+EXIT_WORKERS = 2          # Threads sending exit webhooks
+EXIT_RETRIES = 3          # Attempts per exit before giving up
+EXIT_RETRY_BACKOFF = 0.25 # Seconds before the first retry, doubled each attempt
+EXIT_TIMEOUT = 5          # Seconds per webhook request
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+import config
+from data.compactBars import VOLUME_LIMIT, barTime
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+class BarAggregator:
+    """Builds higher timeframe bars incrementally from 1-minute bars.
+
+    Each 1-minute bar is folded into the forming bar of every timeframe, so the
+    cost per bar stays constant no matter how long the session runs. Completed
+    bars are only turned into a DataFrame when `frame()` is called, and that
+    frame is cached until the timeframe closes another bar.
+    """
+
+    def __init__(self, timeframes=None):
+        self.timeframes = tuple(timeframes if timeframes is not None else config.AGGREGATE_TIMEFRAMES)
+        self.last_ts = None
+        self.bars = {tf: {'Datetime': [], **{col: [] for col in COLUMNS}} for tf in self.timeframes}
+        self.forming = {tf: None for tf in self.timeframes}
+        self.dtypes = None
+        self._frames = {}
+
+    def seed(self, df):
+        """Fold an existing 1-minute history (e.g. from candleHist) into the aggregator."""
+        if self.dtypes is None:
+            self.dtypes = df[COLUMNS].dtypes.to_dict()
+        closed = set()
+        for row in df[COLUMNS].itertuples():
+            closed.update(self.update(row[0], *row[1:]))
+        return sorted(closed)
+
+    def update_df(self, bar_df):
+        """Fold the 1-minute bar(s) returned by candleNew."""
+        return self.seed(bar_df)
+
+    def update(self, ts, open_, high, low, close, volume):
+        """Fold one 1-minute bar. Returns the timeframes that completed a bar."""
+        compact = isinstance(ts, (int, np.integer))
+        ts = barTime(ts)
+        if self.last_ts is not None and ts <= self.last_ts:
+            return []
+        self.last_ts = ts
+
+        closed = []
+        for tf in self.timeframes:
+            freq = f"{tf}min"
+            start = ts.floor(freq)
+            key = start.value if compact else start
+            bar = self.forming[tf]
+
+            if bar is not None and bar['Datetime'] != key:
+                self._close(tf)
+                closed.append(tf)
+                bar = None
+
+            if bar is None:
+                self.forming[tf] = {
+                    'Datetime': key,
+                    'Open': open_,
+                    'High': high,
+                    'Low': low,
+                    'Close': close,
+                    'Volume': float(volume)
+                }
+            else:
+                bar['High'] = max(bar['High'], high)
+                bar['Low'] = min(bar['Low'], low)
+                bar['Close'] = close
+                bar['Volume'] += float(volume)
+
+            # Last minute of the bucket: close now instead of waiting for the next bar.
+            # After a gap the previous bucket may have closed above, report the timeframe once
+            if ts + pd.Timedelta(minutes=1) >= start + pd.Timedelta(minutes=tf):
+                self._close(tf)
+                if tf not in closed:
+                    closed.append(tf)
+
+        return closed
+
+    def _close(self, tf):
+        bar = self.forming[tf]
+        if bar is None:
+            return
+        store = self.bars[tf]
+        for key, value in bar.items():
+            store[key].append(value)
+        self.forming[tf] = None
+        self._frames.pop(tf, None)
+
+    def frame(self, tf, include_partial=False):
+        """Return the bars for a timeframe in the same layout as candleHist."""
+        df = self._frames.get(tf)
+        if df is None:
+            store = self.bars[tf]
+            df = self._build(store, tf)
+            self._frames[tf] = df
+
+        bar = self.forming[tf]
+        if include_partial and bar is not None:
+            partial = self._build({key: [value] for key, value in bar.items()}, tf)
+            return pd.concat([df, partial])
+        return df
+
+    def _build(self, store, tf):
+        df = pd.DataFrame(
+            {col: np.asarray(store[col], dtype=np.float64) for col in COLUMNS},
+            index=pd.Index(store['Datetime'], name='Datetime')
+        )
+        if not self.dtypes:
+            return df
+
+        # Keep each column as compact as its 1-minute input: aggregated prices are input values,
+        # summed volume may outgrow float32 and then stays float64
+        for col in COLUMNS:
+            if self.dtypes[col] != np.float32:
+                continue
+            if col == 'Volume' and np.nanmax(df[col].to_numpy(), initial=0.0) >= VOLUME_LIMIT:
+                continue
+            df[col] = df[col].astype(np.float32)
+        return df
+
+    def frames(self, include_partial=False):
+        return {tf: self.frame(tf, include_partial) for tf in self.timeframes}
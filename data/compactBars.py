@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+PRICE_DECIMALS = 3        # Tick grid float32 prices are rounded back to (covers half-penny prices)
+VOLUME_LIMIT = 2 ** 24    # float32 stores every integer volume exactly up to this
+
+def widenPrices(values):
+    """float64 prices back from float32 storage, exactly equal to the original quotes."""
+    return np.round(np.asarray(values, dtype=np.float64), PRICE_DECIMALS)
+
+def pricePrecision(df):
+    """Max absolute error per column when the bars are stored as float32 instead of float64."""
+    cols = [col for col in PRICE_COLUMNS + ['Volume'] if col in df.columns]
+    values = df[cols].to_numpy(dtype=np.float64)
+    error = np.abs(values.astype(np.float32).astype(np.float64) - values)
+    return pd.Series(np.nanmax(error, axis=0, initial=0.0), index=cols)
+
+def _lossless(values):
+    values = np.asarray(values, dtype=np.float64)
+    return np.array_equal(widenPrices(values.astype(np.float32)), values, equal_nan=True)
+
+def compactBars(df):
+    """Compact copy of an OHLCV frame.
+
+    Prices become float32 only when widenPrices() restores every value exactly (prices on the
+    PRICE_DECIMALS grid, below a few thousand dollars), volume becomes float32 when every value
+    is below VOLUME_LIMIT, and the tz-aware DatetimeIndex becomes a plain int64 index of UTC
+    nanoseconds that the indicator columns can share. Other columns are left as they are.
+    """
+    out = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if col in PRICE_COLUMNS and values.dtype != np.float32 and _lossless(values):
+            values = values.astype(np.float32)
+        elif col == 'Volume' and np.nanmax(np.abs(values), initial=0.0) < VOLUME_LIMIT:
+            values = values.astype(np.float32)
+        out[col] = values
+
+    return pd.DataFrame(out, index=nanosecondIndex(df.index))
+
+def appendBars(history_df, bar_df):
+    """history_df with bar_df appended, keeping history's float32 columns.
+
+    candleNew decides each new bar on its own, so a bar that is off the PRICE_DECIMALS grid comes
+    back float64 and the concat would silently widen the whole column. New values that fit are cast
+    to the history's float32; a column that can't take them is widened and reported.
+    """
+    bar_df = bar_df.copy()
+    for col in bar_df.columns:
+        if col not in history_df.columns or history_df[col].dtype != np.float32 or bar_df[col].dtype == np.float32:
+            continue
+
+        values = bar_df[col].to_numpy()
+        if col == 'Volume':
+            fits = np.nanmax(np.abs(values), initial=0.0) < VOLUME_LIMIT
+        else:
+            fits = col in PRICE_COLUMNS and _lossless(values)
+
+        if fits:
+            bar_df[col] = values.astype(np.float32)
+        else:
+            print(f"COMPACT_MODE: {col} {values.tolist()} does not fit float32, {col} is float64 for the rest of the session")
+
+    return pd.concat([history_df, bar_df])
+
+def nanosecondIndex(index):
+    if index.dtype == np.int64:
+        return index
+    return pd.Index(pd.DatetimeIndex(index).as_unit("ns").asi8, name=index.name)
+
+def barTime(ts, tz="America/New_York"):
+    """Timestamp of a bar, whether the index is a DatetimeIndex or compact nanoseconds."""
+    if isinstance(ts, (int, np.integer)):
+        return pd.Timestamp(int(ts), tz="UTC").tz_convert(tz)
+    return pd.Timestamp(ts)
@@ -1,25 +1,8 @@
-import math
-from datetime import datetime
-
 from alpaca.data.historical import OptionHistoricalDataClient
 from alpaca.data.requests import OptionLatestQuoteRequest
 
 import config
-
-def optionSymbol(signal, current_price): 
-
-    if signal == 1:
-        option_type = "C"
-        strike = math.floor(current_price)
-    elif signal == -1:
-        option_type = "P"
-        strike = math.ceil(current_price)
-    
-    date_part = datetime.now().strftime("%y%m%d")
-    strike_part = f"{int(strike * 1000):08d}"
-
-    return f"{config.SYMBOL}{date_part}{option_type}{strike_part}"
-
+from data.optionsSymbol import optionSymbol
 
 client = OptionHistoricalDataClient(config.ALPACA_KEY, config.ALPACA_SECRET)
 
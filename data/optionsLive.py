@@ -7,7 +7,7 @@ from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 
 class OptionLive:
-    def __init__(self):
+    def __init__(self, exit_queue=None):
         self.ws = None
         self.is_connected = False
         self.is_listening = False
@@ -16,6 +16,12 @@ class OptionLive:
         self.stop_losses = {}
         self.price_callbacks = []
         self.position_states = {}
+        self.exit_queue = exit_queue
+        if exit_queue is not None:
+            exit_queue.on_result = self._on_exit_result
+        self.exit_orders = {}
+        self.exit_fills = {}
+        self._tasks = set()
         
     async def connect(self):
         if self.ws is not None and self.is_connected:
@@ -174,6 +180,8 @@ class OptionLive:
             'tp2_active': True,
             'trailing_active': True
         }
+        # Same strike can be traded again later in the day, count this trade's exits from zero
+        self.exit_fills[symbol] = self._new_fills()
         
         print(f"2-Level TP risk management set for {symbol}:")
         print(f"   Entry Price: ${entry_price:.2f}")
@@ -213,9 +221,8 @@ class OptionLive:
             print(f"   Closing remaining: {', '.join(remaining_portions)}")
             print(f"   {symbol} FULLY CLOSED\n")
             
-            del self.stop_losses[symbol]
-            del self.position_states[symbol]
-            await self.unsubscribe(symbol)
+            self._exit(symbol, self._remaining_size(stop_data, position_state), "time_limit", current_price)
+            self._close_position(symbol)
             return
 
         if position_state.get('tp1_active'):
@@ -233,13 +240,12 @@ class OptionLive:
                 remaining_size = 1.0 - stop_data['tp1_size']
                 print(f"   Remaining {remaining_size*100:.0f}%: TP2 @ +{stop_data['tp2_pct']*100:.1f}% and trailing\n")
                 
+                self._exit(symbol, stop_data['tp1_size'], "tp1", current_price)
                 position_state['tp1_active'] = False
                 stop_data['stop_at_breakeven'] = True
                 
                 if not position_state.get('tp2_active') and not position_state.get('trailing_active'):
-                    del self.stop_losses[symbol]
-                    del self.position_states[symbol]
-                    await self.unsubscribe(symbol)
+                    self._close_position(symbol)
                 return
         
         if position_state.get('tp2_active'):
@@ -255,12 +261,11 @@ class OptionLive:
                 print(f"   Closing {stop_data['tp2_size']*100:.0f}% of position")
                 print(f"   🚀 TRAILING STOP NOW ACTIVE for remaining {trailing_size*100:.0f}%\n")
                 
+                self._exit(symbol, stop_data['tp2_size'], "tp2", current_price)
                 position_state['tp2_active'] = False
                 
                 if not position_state.get('trailing_active'):
-                    del self.stop_losses[symbol]
-                    del self.position_states[symbol]
-                    await self.unsubscribe(symbol)
+                    self._close_position(symbol)
                 return
 
         if position_state.get('tp1_active') or position_state.get('tp2_active'):
@@ -284,9 +289,8 @@ class OptionLive:
                     print(f"   Closing remaining: {', '.join(remaining_portions)}")
                     print(f"   {symbol} FULLY CLOSED\n")
                     
-                    del self.stop_losses[symbol]
-                    del self.position_states[symbol]
-                    await self.unsubscribe(symbol)
+                    self._exit(symbol, self._remaining_size(stop_data, position_state), "breakeven_stop", current_price)
+                    self._close_position(symbol)
                     return
             else:
                 hard_stop_price = stop_data['entry'] * (1 - stop_data['hard_stop_pct'])
@@ -299,9 +303,8 @@ class OptionLive:
                     print(f"   Loss: {profit_pct:+.2f}%")
                     print(f"   {symbol} FULLY CLOSED (before TP1)\n")
                     
-                    del self.stop_losses[symbol]
-                    del self.position_states[symbol]
-                    await self.unsubscribe(symbol)
+                    self._exit(symbol, self._remaining_size(stop_data, position_state), "hard_stop", current_price)
+                    self._close_position(symbol)
                     return
 
         if position_state.get('trailing_active') and not position_state.get('tp2_active'):
@@ -318,12 +321,79 @@ class OptionLive:
                 print(f"   Closing final {trailing_size*100:.0f}% trailing portion")
                 print(f"   {symbol} FULLY CLOSED\n")
                 
+                self._exit(symbol, trailing_size, "trailing_stop", current_price)
                 position_state['trailing_active'] = False
-                del self.stop_losses[symbol]
-                del self.position_states[symbol]
-                await self.unsubscribe(symbol)
+                self._close_position(symbol)
                 return
     
+    def _remaining_size(self, stop_data, position_state):
+        remaining = 0.0
+        if position_state.get('tp1_active'):
+            remaining += stop_data['tp1_size']
+        if position_state.get('tp2_active'):
+            remaining += stop_data['tp2_size']
+        if position_state.get('trailing_active'):
+            remaining += 1.0 - stop_data['tp1_size'] - stop_data['tp2_size']
+        return remaining
+
+    def _exit(self, symbol, portion, reason, price):
+        """Queue an exit order. Never waits on the broker, the result comes back in _on_exit_result."""
+        if portion <= 0:
+            return
+        if self.exit_queue is None:
+            print(f"   No exit queue configured, {reason} exit of {portion*100:.0f}% not sent")
+            return
+
+        intent = self.exit_queue.submit(symbol, portion, reason, price)
+        intent['status'] = 'pending'
+        self.exit_orders[intent['key']] = intent
+        fills = self.exit_fills.setdefault(symbol, self._new_fills())
+        fills['pending'] += portion
+        fills['pending_orders'] += 1
+
+    def _new_fills(self):
+        return {'pending': 0.0, 'confirmed': 0.0, 'failed': 0.0, 'pending_orders': 0}
+
+    def _on_exit_result(self, intent, ok):
+        symbol = intent['symbol']
+        self.exit_orders.pop(intent['key'], None)
+        fills = self.exit_fills.setdefault(symbol, self._new_fills())
+        fills['pending'] = max(0.0, fills['pending'] - intent['portion'])
+        fills['pending_orders'] -= 1
+
+        if ok:
+            intent['status'] = 'confirmed'
+            fills['confirmed'] += intent['portion']
+            send_ms = (intent['sent_at'] - intent['decided_at']) * 1000
+            confirm_ms = (intent['confirmed_at'] - intent['decided_at']) * 1000
+            print(f"✓ Exit {intent['reason']} {intent['portion']*100:.0f}% of {symbol} confirmed (sent after {send_ms:.1f}ms, confirmed after {confirm_ms:.0f}ms)")
+        else:
+            intent['status'] = 'failed'
+            fills['failed'] += intent['portion']
+            print(f"✗ Exit {intent['reason']} {intent['portion']*100:.0f}% of {symbol} FAILED after {intent['attempts']} attempts, close it manually")
+            print(f"   New entries stay blocked until the bot is restarted")
+
+    def exits_outstanding(self):
+        """Symbols whose exits are not all confirmed by the broker, so contracts may still be held.
+
+        Pending exits block new entries until they are confirmed, failed ones for the rest of the run.
+        """
+        return {
+            symbol: fills for symbol, fills in self.exit_fills.items()
+            if fills['pending_orders'] > 0 or fills['failed'] > 0
+        }
+
+    def has_exposure(self):
+        return bool(self.stop_losses) or bool(self.exits_outstanding())
+
+    def _close_position(self, symbol):
+        del self.stop_losses[symbol]
+        del self.position_states[symbol]
+        # Unsubscribing waits on the websocket, keep it off the quote path
+        task = asyncio.create_task(self.unsubscribe(symbol))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
     def stop_listening(self):
         self.is_listening = False
         print("Stopping listener...")
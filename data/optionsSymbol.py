@@ -0,0 +1,18 @@
+import math
+from datetime import datetime
+
+import config
+
+def optionSymbol(signal, current_price, date=None): 
+
+    if signal == 1:
+        option_type = "C"
+        strike = math.floor(current_price)
+    elif signal == -1:
+        option_type = "P"
+        strike = math.ceil(current_price)
+    
+    date_part = (date or datetime.now()).strftime("%y%m%d")
+    strike_part = f"{int(strike * 1000):08d}"
+
+    return f"{config.SYMBOL}{date_part}{option_type}{strike_part}"
@@ -0,0 +1,189 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import config
+from data.compactBars import nanosecondIndex
+
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+HEADER_DTYPE = np.dtype([
+    ('running', np.int64),
+    ('position_open', np.int64),
+    ('bar_count', np.int64),
+    ('intent_head', np.int64),
+    ('intent_tail', np.int64),
+])
+BAR_DTYPE = np.dtype([('ts', np.int64)] + [(col, np.float64) for col in BAR_COLUMNS])
+QUOTE_DTYPE = np.dtype([('seq', np.int64), ('ts', np.int64), ('mid', np.float64), ('symbol', 'S32')])
+INTENT_DTYPE = np.dtype([('ts', np.int64), ('signal', np.int64), ('close', np.float64), ('symbol', 'S32')])
+
+class SharedState:
+    """Shared-memory tables between the ingestion and strategy processes.
+
+    One block holds a header, a ring buffer of 1-minute bars, a latest-quote table and a
+    single-producer/single-consumer queue of order intents. Every field has exactly one
+    writer process, so no locks are needed:
+
+    - bars: written by ingestion, published by bumping `bar_count` after the row is written
+    - quotes: written by ingestion under a per-slot sequence counter (odd while writing), one
+      slot per subscribed option, freed on unsubscribe; read by strategy for position status
+    - intents: pushed by strategy (moves `intent_tail`), popped by ingestion (moves `intent_head`),
+      stamped with the UTC nanoseconds of the bar the signal was computed on
+    """
+
+    def __init__(self, name=None):
+        self.layout = [
+            ('header', HEADER_DTYPE, 1),
+            ('bars', BAR_DTYPE, config.BAR_BUFFER_SIZE),
+            ('quotes', QUOTE_DTYPE, config.QUOTE_SLOTS),
+            ('intents', INTENT_DTYPE, config.INTENT_QUEUE_SIZE),
+        ]
+        size = sum(dtype.itemsize * count for _, dtype, count in self.layout)
+
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.shm.buf[:size] = bytes(size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        offset = 0
+        for field, dtype, count in self.layout:
+            setattr(self, field, np.ndarray((count,), dtype=dtype, buffer=self.shm.buf, offset=offset))
+            offset += dtype.itemsize * count
+
+        self.quote_slots = {}
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.header = self.bars = self.quotes = self.intents = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+    # ========= HEADER ========= #
+
+    def start(self):
+        self.header['running'] = 1
+
+    def stop(self):
+        self.header['running'] = 0
+
+    def running(self):
+        return bool(self.header['running'][0])
+
+    def set_position_open(self, is_open):
+        self.header['position_open'] = int(is_open)
+
+    def position_open(self):
+        return bool(self.header['position_open'][0])
+
+    # ========= BARS (writer: ingestion) ========= #
+
+    def bar_count(self):
+        return int(self.header['bar_count'][0])
+
+    def last_bar_ts(self):
+        count = self.bar_count()
+        if count == 0:
+            return None
+        return int(self.bars['ts'][(count - 1) % len(self.bars)])
+
+    def append_bars(self, df):
+        count = self.bar_count()
+        values = df[BAR_COLUMNS].to_numpy(dtype=np.float64)
+        for ts, row in zip(nanosecondIndex(df.index), values):
+            self.bars[count % len(self.bars)] = (ts, *row)
+            count += 1
+            self.header['bar_count'] = count
+
+    def read_bars(self):
+        """Copy of the buffered bars in the same layout as candleHist."""
+        count = self.bar_count()
+        capacity = len(self.bars)
+        if count <= capacity:
+            rows = self.bars[:count].copy()
+        else:
+            start = count % capacity
+            rows = np.concatenate([self.bars[start:], self.bars[:start]])
+
+        index = pd.DatetimeIndex(rows['ts'].astype('datetime64[ns]'), name='Datetime')
+        index = index.tz_localize('UTC').tz_convert('America/New_York')
+        return pd.DataFrame({col: rows[col] for col in BAR_COLUMNS}, index=index)
+
+    # ========= QUOTES (writer: ingestion) ========= #
+
+    def write_quote(self, symbol, mid, ts):
+        """Publish a quote. Returns False when every slot is taken by another symbol."""
+        slot = self.quote_slots.get(symbol)
+        if slot is None:
+            used = set(self.quote_slots.values())
+            slot = next((i for i in range(len(self.quotes)) if i not in used), None)
+            if slot is None:
+                return False
+            self.quote_slots[symbol] = slot
+
+        self._write_quote_slot(slot, symbol.encode(), mid, ts)
+        return True
+
+    def release_quote(self, symbol):
+        """Free a symbol's slot once it is unsubscribed."""
+        slot = self.quote_slots.pop(symbol, None)
+        if slot is not None:
+            self._write_quote_slot(slot, b"", np.nan, 0)
+
+    def _write_quote_slot(self, slot, key, mid, ts):
+        self.quotes['seq'][slot] += 1
+        self.quotes['symbol'][slot] = key
+        self.quotes['mid'][slot] = mid
+        self.quotes['ts'][slot] = ts
+        self.quotes['seq'][slot] += 1
+
+    def read_quotes(self):
+        """Latest {symbol: (mid, ts)} for every symbol in the table."""
+        quotes = {}
+        for slot in range(len(self.quotes)):
+            while True:
+                seq = self.quotes['seq'][slot]
+                quote = self.quotes[slot].copy()
+                if seq % 2 == 0 and seq == self.quotes['seq'][slot]:
+                    break
+            if quote['symbol']:
+                quotes[quote['symbol'].decode()] = (float(quote['mid']), int(quote['ts']))
+        return quotes
+
+    def read_quote(self, symbol):
+        """Latest (mid, ts) for a symbol, or None if it is not in the table."""
+        return self.read_quotes().get(symbol)
+
+    # ========= INTENTS (writer: strategy, reader: ingestion) ========= #
+
+    def push_intent(self, signal, symbol, close, ts):
+        head = int(self.header['intent_head'][0])
+        tail = int(self.header['intent_tail'][0])
+        if tail - head >= len(self.intents):
+            return False
+
+        self.intents[tail % len(self.intents)] = (ts, signal, close, symbol.encode())
+        self.header['intent_tail'] = tail + 1
+        return True
+
+    def pop_intent(self):
+        head = int(self.header['intent_head'][0])
+        tail = int(self.header['intent_tail'][0])
+        if head == tail:
+            return None
+
+        intent = self.intents[head % len(self.intents)].copy()
+        self.header['intent_head'] = head + 1
+        return {
+            'ts': int(intent['ts']),
+            'signal': int(intent['signal']),
+            'close': float(intent['close']),
+            'symbol': intent['symbol'].decode()
+        }
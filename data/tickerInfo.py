@@ -8,20 +8,11 @@ from datetime import datetime
 from pytz import timezone, utc
 
 import config
+from data.compactBars import compactBars
 
 client = StockHistoricalDataClient(config.ALPACA_KEY, config.ALPACA_SECRET)
 
-def candleHist(symbol, start_time, end_time):
-    today = datetime.now().strftime("%Y-%m-%d")
-
-    request = StockBarsRequest(
-        symbol_or_symbols=[symbol],
-        timeframe=TimeFrame.Minute,
-        start=today + start_time,
-        end=today + end_time,
-        feed="iex"
-    )
-    bars = client.get_stock_bars(request)
+def _formatBars(bars):
     df = bars.df.reset_index()
 
     if df.empty:
@@ -46,6 +37,42 @@ def candleHist(symbol, start_time, end_time):
 
     return df
 
+def candleHist(symbol, start_time, end_time):
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    request = StockBarsRequest(
+        symbol_or_symbols=[symbol],
+        timeframe=TimeFrame.Minute,
+        start=today + start_time,
+        end=today + end_time,
+        feed="iex"
+    )
+    df = _formatBars(client.get_stock_bars(request))
+
+    if df is not None and config.COMPACT_MODE:
+        df = compactBars(df)
+
+    return df
+
+def candleRange(symbol, start_date, end_date):
+    """1-minute bars for every regular session from start_date to end_date (YYYY-MM-DD, inclusive)."""
+
+    ny_tz = timezone("America/New_York")
+    request = StockBarsRequest(
+        symbol_or_symbols=[symbol],
+        timeframe=TimeFrame.Minute,
+        start=ny_tz.localize(datetime.strptime(start_date, "%Y-%m-%d")),
+        end=ny_tz.localize(datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59)),
+        feed="iex"
+    )
+    df = _formatBars(client.get_stock_bars(request))
+    if df is None:
+        return None
+
+    start = config.START[1:6]
+    end = config.END[1:6]
+    return df.between_time(start, end)
+
 def candleNew(symbol):
 
     request = StockLatestBarRequest(
@@ -68,6 +95,9 @@ def candleNew(symbol):
     }, index=[ts])
     df.index.name = 'Datetime'
 
+    if config.COMPACT_MODE:
+        df = compactBars(df)
+
     return df
 
  
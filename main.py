@@ -1,10 +1,15 @@
 from data.optionsLive import OptionLive
+from broker.exitQueue import ExitQueue
+from profiler import SessionProfiler
 import asyncio
 import time
 
 from data.tickerInfo import candleHist, candleNew
+from data.barAggregator import BarAggregator
+from data.compactBars import appendBars, barTime
 from data.optionsInfo import optionsNew, optionSymbol
 from strategies.signal import calculateIndicators, calculateSignal
+from strategies.indicators import TIMEFRAME_INDICATORS
 from broker.order import buy_call, buy_put
 import config
 
@@ -17,7 +22,35 @@ pd.set_option('display.max_colwidth', None)
 pd.set_option('display.width', 1000)
 
 
-async def main_loop_async(option_live, history_df):
+async def enter_position(option_live, signal, option_sym):
+    """Send the entry webhook for a signal and start tracking the option's exits."""
+
+    # Blocking HTTP runs in a thread so quotes and exit checks keep flowing on the loop
+    if signal == 1:
+        await asyncio.to_thread(buy_call)
+    else:
+        await asyncio.to_thread(buy_put)
+
+    try:
+        await option_live.subscribe(option_sym)
+        entry_price = await asyncio.to_thread(optionsNew, option_sym)
+        if entry_price:
+            await option_live.set_trailing_stop_loss(
+                option_sym, 
+                entry_price, 
+                tp1_pct=config.TP1_PCT,
+                tp1_size=config.TP1_POSITION_SIZE,
+                tp2_pct=config.TP2_PCT,
+                tp2_size=config.TP2_POSITION_SIZE,
+                trailing_pct=config.TRAILING_SL,
+                hard_stop_pct=config.HARD_SL,
+                max_hold_seconds=config.TIME_LIMIT
+            )
+    except Exception as e:
+        print(f"Failed to subscribe to {option_sym}: {e}")
+
+
+async def main_loop_async(option_live, history_df, bar_aggregator, timeframe_indicators):
     """Async version of main loop that runs every minute and subscribes to options."""
     
     if history_df is None:
@@ -28,17 +61,32 @@ async def main_loop_async(option_live, history_df):
     seconds_to_next_minute = 60 - now.second - now.microsecond/1_000_000
     await asyncio.sleep(seconds_to_next_minute + 1)
 
-    latest_bar_df = candleNew(config.SYMBOL)
+    # The latest bar is an HTTP request, keep it off the loop that runs the quote listener
+    latest_bar_df = await asyncio.to_thread(candleNew, config.SYMBOL)
     last_ts = history_df.index[-1]
 
     if latest_bar_df.index[0] > last_ts:
-        history_df = pd.concat([history_df, latest_bar_df])
+        history_df = appendBars(history_df, latest_bar_df)
+        for tf in bar_aggregator.update_df(latest_bar_df):
+            timeframe_indicators[tf] = calculateIndicators(bar_aggregator.frame(tf))
 
     indicator_df = calculateIndicators(history_df)
     signal = calculateSignal(indicator_df, config.INDICATOR_LOOKBACK)
 
-    ts_str = str(history_df.index[-1])
+    ts_str = str(barTime(history_df.index[-1]))
     
+    outstanding = option_live.exits_outstanding()
+    if outstanding and not option_live.stop_losses:
+        print(f"\n{ts_str} ⚠️ EXITS NOT CONFIRMED - Cannot enter new trade")
+        for symbol, fills in outstanding.items():
+            print(f"  {symbol}: {fills['pending']*100:.0f}% pending, {fills['failed']*100:.0f}% failed")
+            if fills['failed'] > 0:
+                print(f"  Close {symbol} manually, then restart the bot")
+        if signal != 0:
+            print(f"  Skipped Signal: {'CALL' if signal == 1 else 'PUT'} {optionSymbol(signal, history_df['Close'].iloc[-1])} for {config.SYMBOL} at {history_df['Close'].iloc[-1]}")
+        print()
+        return history_df, True
+
     if option_live.stop_losses:
         active_symbol = list(option_live.stop_losses.keys())[0]
         stop_data = option_live.stop_losses[active_symbol]
@@ -63,6 +111,9 @@ async def main_loop_async(option_live, history_df):
         print(f"  Time Elapsed: {elapsed:.0f}s / {stop_data['max_hold_seconds']}s")
         print(f"  Current Stop: {current_sl_status}")
         print(f"  Remaining: {', '.join(remaining_portions)}")
+        fills = option_live.exit_fills.get(active_symbol)
+        if fills:
+            print(f"  Exits: {fills['confirmed']*100:.0f}% confirmed, {fills['pending']*100:.0f}% pending, {fills['failed']*100:.0f}% failed")
         if signal == 1:
             skipped_option = optionSymbol(signal, history_df["Close"].iloc[-1])
             print(f"  Skipped Signal: CALL {skipped_option} for {config.SYMBOL} at {history_df['Close'].iloc[-1]}")
@@ -74,47 +125,13 @@ async def main_loop_async(option_live, history_df):
 
     if signal == 1:
         option_sym = optionSymbol(signal, history_df["Close"].iloc[-1])
-        print(f"{ts_str} Call Signal Detected - {option_sym} @ {optionsNew(option_sym)} for {config.SYMBOL} at {history_df['Close'].iloc[-1]}")
-        buy_call()
-        try:
-            await option_live.subscribe(option_sym)
-            entry_price = optionsNew(option_sym)
-            if entry_price:
-                await option_live.set_trailing_stop_loss(
-                    option_sym, 
-                    entry_price, 
-                    tp1_pct=config.TP1_PCT,
-                    tp1_size=config.TP1_POSITION_SIZE,
-                    tp2_pct=config.TP2_PCT,
-                    tp2_size=config.TP2_POSITION_SIZE,
-                    trailing_pct=config.TRAILING_SL,
-                    hard_stop_pct=config.HARD_SL,
-                    max_hold_seconds=config.TIME_LIMIT
-                )
-        except Exception as e:
-            print(f"Failed to subscribe to {option_sym}: {e}")
+        print(f"{ts_str} Call Signal Detected - {option_sym} for {config.SYMBOL} at {history_df['Close'].iloc[-1]}")
+        await enter_position(option_live, signal, option_sym)
             
     elif signal == -1:
         option_sym = optionSymbol(signal, history_df["Close"].iloc[-1])
-        print(f"{ts_str} Put Signal Detected - {option_sym} @ {optionsNew(option_sym)} for {config.SYMBOL} at {history_df['Close'].iloc[-1]}")
-        buy_put()
-        try:
-            await option_live.subscribe(option_sym)
-            entry_price = optionsNew(option_sym)
-            if entry_price:
-                await option_live.set_trailing_stop_loss(
-                    option_sym, 
-                    entry_price, 
-                    tp1_pct=config.TP1_PCT,
-                    tp1_size=config.TP1_POSITION_SIZE,
-                    tp2_pct=config.TP2_PCT,
-                    tp2_size=config.TP2_POSITION_SIZE,
-                    trailing_pct=config.TRAILING_SL,
-                    hard_stop_pct=config.HARD_SL,
-                    max_hold_seconds=config.TIME_LIMIT
-                )
-        except Exception as e:
-            print(f"Failed to subscribe to {option_sym}: {e}")
+        print(f"{ts_str} Put Signal Detected - {option_sym} for {config.SYMBOL} at {history_df['Close'].iloc[-1]}")
+        await enter_position(option_live, signal, option_sym)
     else:
         print(f"{ts_str} No Signal Detected for {config.SYMBOL} at {history_df['Close'].iloc[-1]}")
 
@@ -122,15 +139,35 @@ async def main_loop_async(option_live, history_df):
 
 
 async def main():
+
+    # Installed first: until SIGUSR1 has a handler, its default action kills the process
+    profiler = SessionProfiler({
+        "minute_loop": main_loop_async,
+        "listen": OptionLive.listen
+    })
+    profiler.install()
     
     history_df = candleHist(config.SYMBOL, config.START, config.END)
     
     if history_df is None:
         print(f"Failed to load historical data for {config.SYMBOL}")
+        await profiler.stop()
         return
+
+    bar_aggregator = BarAggregator()
+    bar_aggregator.seed(history_df)
+    timeframe_indicators = TIMEFRAME_INDICATORS
+    timeframe_indicators.update({
+        tf: calculateIndicators(frame)
+        for tf, frame in bar_aggregator.frames().items()
+        if not frame.empty
+    })
     
-    option_live = OptionLive()
+    exit_queue = ExitQueue() if config.EXIT_WEBHOOK else None
+    option_live = OptionLive(exit_queue)
     await option_live.connect()
+    if exit_queue:
+        exit_queue.start()
     
     listener = asyncio.create_task(option_live.listen())
     
@@ -140,19 +177,35 @@ async def main():
     
     try:
         while True:
-            history_df, keep_running = await main_loop_async(option_live, history_df)
+            history_df, keep_running = await main_loop_async(option_live, history_df, bar_aggregator, timeframe_indicators)
             if not keep_running:
                 break
+            profiler.record_state(
+                history_rows=len(history_df),
+                history_bytes=int(history_df.memory_usage(deep=True).sum()),
+                subscribed_symbols=len(option_live.subscribed_symbols),
+                price_callbacks=len(option_live.price_callbacks),
+                stop_losses=len(option_live.stop_losses),
+                exit_orders=len(option_live.exit_orders)
+            )
     except KeyboardInterrupt:
         print("\nShutting down...")
     finally:
         # Clean up
+        await profiler.stop()
         await option_live.disconnect()
         listener.cancel()
         print("Disconnected from WebSocket")
+        if exit_queue:
+            await exit_queue.stop()
+            print(f"Exit order latency (ms): {exit_queue.latency_stats()}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if config.MULTIPROCESS:
+        from processes import run_multiprocess
+        run_multiprocess()
+    else:
+        asyncio.run(main())
 
 
@@ -0,0 +1,285 @@
+import asyncio
+import gc
+import multiprocessing as mp
+import multiprocessing.connection
+import os
+import signal
+import time
+
+from data.optionsLive import OptionLive
+from broker.exitQueue import ExitQueue
+from data.tickerInfo import candleHist, candleNew
+from data.barAggregator import BarAggregator
+from data.compactBars import barTime, compactBars, nanosecondIndex
+from data.optionsInfo import optionSymbol
+from data.sharedState import SharedState
+from strategies.signal import calculateIndicators, calculateSignal
+from strategies.indicators import TIMEFRAME_INDICATORS
+from main import enter_position
+from profiler import SessionProfiler
+import config
+
+INTENT_POLL_SECONDS = 0.01
+BAR_POLL_SECONDS = 0.05
+
+
+def _pin(cpu):
+    if cpu is None or not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError as e:
+        print(f"Could not pin {mp.current_process().name} to CPU {cpu}: {e}")
+
+
+# ========= INGESTION PROCESS ========= #
+
+async def _poll_bars(state):
+    """Append each new 1-minute bar to the shared bar buffer."""
+    while True:
+        now = time.time()
+        await asyncio.sleep(60 - now % 60 + 1)
+
+        try:
+            latest_bar_df = await asyncio.to_thread(candleNew, config.SYMBOL)
+        except Exception as e:
+            print(f"Failed to fetch latest bar: {e}")
+            continue
+
+        last_ts = state.last_bar_ts()
+        if last_ts is None or nanosecondIndex(latest_bar_df.index)[0] > last_ts:
+            state.append_bars(latest_bar_df)
+
+
+async def _ingestion_async(state):
+    profiler = SessionProfiler({
+        "listen": OptionLive.listen,
+        "bar_poll": _poll_bars,
+        "entries": _handle_intent
+    })
+    profiler.install()
+
+    history_df = candleHist(config.SYMBOL, config.START, config.END)
+
+    if history_df is None:
+        print(f"Failed to load historical data for {config.SYMBOL}")
+        state.stop()
+        await profiler.stop()
+        return
+
+    state.append_bars(history_df)
+
+    exit_queue = ExitQueue() if config.EXIT_WEBHOOK else None
+    option_live = OptionLive(exit_queue)
+    await option_live.connect()
+    if exit_queue:
+        exit_queue.start()
+
+    async def publish_quote(symbol, mid_price, timestamp):
+        # Late quotes after an unsubscribe would take a slot that is never released
+        if symbol not in option_live.subscribed_symbols:
+            return
+        if not state.write_quote(symbol, mid_price, timestamp.seconds * 1_000_000_000 + timestamp.nanoseconds):
+            print(f"Quote table full, {symbol} not published")
+
+    option_live.price_callbacks.append(publish_quote)
+
+    listener = asyncio.create_task(option_live.listen())
+    bars = asyncio.create_task(_poll_bars(state))
+
+    # Everything allocated so far lives for the whole session, keep it out of GC passes
+    gc.freeze()
+
+    try:
+        while state.running():
+            intent = state.pop_intent()
+            if intent:
+                await _handle_intent(state, option_live, intent)
+            state.set_position_open(option_live.has_exposure())
+            for symbol in list(state.quote_slots):
+                if symbol not in option_live.subscribed_symbols:
+                    state.release_quote(symbol)
+            if profiler.enabled:
+                profiler.record_state(
+                    subscribed_symbols=len(option_live.subscribed_symbols),
+                    price_callbacks=len(option_live.price_callbacks),
+                    stop_losses=len(option_live.stop_losses),
+                    exit_orders=len(option_live.exit_orders),
+                    quote_slots=len(state.quote_slots)
+                )
+            await asyncio.sleep(INTENT_POLL_SECONDS)
+    finally:
+        await profiler.stop()
+        bars.cancel()
+        await option_live.disconnect()
+        listener.cancel()
+        print("Disconnected from WebSocket")
+        if exit_queue:
+            await exit_queue.stop()
+            print(f"Exit order latency (ms): {exit_queue.latency_stats()}")
+
+
+async def _handle_intent(state, option_live, intent):
+    """Enter on an intent from the strategy process unless it is stale or a position is open.
+
+    Ingestion owns the position state; the strategy's position_open flag can be a bar behind.
+    """
+    side = "CALL" if intent['signal'] == 1 else "PUT"
+    if option_live.has_exposure():
+        print(f"Dropped intent {side} {intent['symbol']}: position or exits still open")
+        return
+
+    last_ts = state.last_bar_ts()
+    if last_ts is not None and intent['ts'] < last_ts:
+        print(f"Dropped stale intent {side} {intent['symbol']} from bar {barTime(intent['ts'])}")
+        return
+
+    await enter_position(option_live, intent['signal'], intent['symbol'])
+
+
+def ingestion_process(shm_name, cpu):
+    """Websocket quotes, exits and order sending. Writes bars and quotes to shared memory."""
+    _pin(cpu)
+    state = SharedState(shm_name)
+    try:
+        asyncio.run(_ingestion_async(state))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        state.close()
+
+
+# ========= STRATEGY PROCESS ========= #
+
+def _read_history(state):
+    history_df = state.read_bars()
+    if config.COMPACT_MODE:
+        history_df = compactBars(history_df)
+    return history_df
+
+
+def _strategy_step(state, bar_aggregator, new_bars):
+    """Indicators and signal for the newest bar(s). Pushes an intent on a signal, returns the bars."""
+    history_df = _read_history(state)
+    for tf in bar_aggregator.update_df(history_df.iloc[-new_bars:]):
+        TIMEFRAME_INDICATORS[tf] = calculateIndicators(bar_aggregator.frame(tf))
+
+    indicator_df = calculateIndicators(history_df)
+    signal = calculateSignal(indicator_df, config.INDICATOR_LOOKBACK)
+
+    close = history_df['Close'].iloc[-1]
+    ts_str = str(barTime(history_df.index[-1]))
+
+    if signal == 0:
+        print(f"{ts_str} No Signal Detected for {config.SYMBOL} at {close}")
+        return history_df
+
+    option_sym = optionSymbol(signal, close)
+    side = "Call" if signal == 1 else "Put"
+
+    if state.position_open():
+        print(f"{ts_str} ⚠️ TRADE IN PROGRESS - Skipped Signal: {side.upper()} {option_sym} for {config.SYMBOL} at {close}")
+        for symbol, (mid, _) in state.read_quotes().items():
+            print(f"  Active Position: {symbol} @ {mid:.2f}")
+        return history_df
+
+    print(f"{ts_str} {side} Signal Detected - {option_sym} for {config.SYMBOL} at {close}")
+    # Intents carry their bar's timestamp so ingestion can drop them once a newer bar is in
+    if not state.push_intent(signal, option_sym, float(close), int(nanosecondIndex(history_df.index[-1:])[0])):
+        print(f"Intent queue full, dropped {option_sym}")
+    return history_df
+
+
+async def _strategy_async(state):
+    # Runs on an event loop only so the profiler's lag probe and periodic dumps have one
+    profiler = SessionProfiler({"minute_loop": _strategy_step})
+    profiler.install()
+
+    try:
+        while state.running() and state.bar_count() == 0:
+            await asyncio.sleep(BAR_POLL_SECONDS)
+
+        seen = state.bar_count()
+        bar_aggregator = BarAggregator()
+        bar_aggregator.seed(_read_history(state))
+        TIMEFRAME_INDICATORS.update({
+            tf: calculateIndicators(frame)
+            for tf, frame in bar_aggregator.frames().items()
+            if not frame.empty
+        })
+
+        while state.running():
+            count = state.bar_count()
+            if count == seen:
+                await asyncio.sleep(BAR_POLL_SECONDS)
+                continue
+
+            history_df = _strategy_step(state, bar_aggregator, count - seen)
+            seen = count
+            profiler.record_state(
+                history_rows=len(history_df),
+                history_bytes=int(history_df.memory_usage(deep=True).sum())
+            )
+    finally:
+        await profiler.stop()
+
+
+def strategy_process(shm_name, cpu):
+    """Minute signal pipeline. Reads shared bars and pushes order intents back."""
+    _pin(cpu)
+    state = SharedState(shm_name)
+
+    try:
+        asyncio.run(_strategy_async(state))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        state.close()
+
+
+# ========= PARENT ========= #
+
+def _forward_signal(processes, signum):
+    for process in processes:
+        if process.is_alive():
+            os.kill(process.pid, signum)
+
+
+def run_multiprocess():
+    """Run ingestion and strategy in separate processes pinned to their own cores."""
+    state = SharedState()
+    state.start()
+
+    ctx = mp.get_context("spawn")
+    processes = [
+        ctx.Process(target=ingestion_process, args=(state.name, config.INGESTION_CPU), name="ingestion"),
+        ctx.Process(target=strategy_process, args=(state.name, config.STRATEGY_CPU), name="strategy"),
+    ]
+
+    # SIGUSR1's default action kills the process. The children inherit the ignored signal until their
+    # profilers install a handler, and the parent passes it on so one kill toggles both profilers
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+
+    for process in processes:
+        process.start()
+
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: _forward_signal(processes, signum))
+
+    print(f"Started trading bot for {config.SYMBOL} (ingestion pid {processes[0].pid}, strategy pid {processes[1].pid})")
+    print("=" * 60)
+
+    try:
+        # Either process exiting ends the session
+        mp.connection.wait([process.sentinel for process in processes])
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        state.stop()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        state.close()
+        state.unlink()
@@ -0,0 +1,214 @@
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+
+import config
+
+class SessionProfiler:
+    """Runtime profiling for full-session runs, written to local files for offline comparison.
+
+    - CPU: a background thread samples the event loop thread's stack every
+      PROFILE_SAMPLE_INTERVAL and attributes each sample to a subsystem (the first matching
+      function found on the stack). Stacks are written in folded format, one file per
+      subsystem, ready for flamegraph.pl / speedscope.
+    - Memory: tracemalloc snapshots every PROFILE_SNAPSHOT_INTERVAL, diffed against the
+      previous and the first snapshot, along with the sizes passed to record_state().
+    - Event loop lag: how late a PROFILE_LAG_INTERVAL sleep wakes up, summarised per interval.
+
+    Turned on with PROFILE=1, or toggled at runtime with SIGUSR1.
+    """
+
+    def __init__(self, subsystems, output_dir=None):
+        self.subsystems = {func.__code__: name for name, func in subsystems.items()}
+        self.output_dir = os.path.join(
+            output_dir or config.PROFILE_DIR,
+            datetime.now().strftime("%Y%m%d_%H%M%S") + f"_{os.getpid()}"
+        )
+        self.enabled = False
+        self.loop = None
+        self.thread_id = None
+        self.samples = {}
+        self.lags = []
+        self.state = {}
+        self.first_snapshot = None
+        self.last_snapshot = None
+        self.snapshot_count = 0
+        self._sampler = None
+        self._sampler_stop = threading.Event()
+        self._tasks = []
+        self._stop_task = None
+        self._owns_tracemalloc = False
+
+    # ========= CONTROL ========= #
+
+    def install(self):
+        """Start if PROFILE is set and toggle on SIGUSR1. Call from inside the event loop."""
+        self.loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        if hasattr(signal, "SIGUSR1"):
+            self.loop.add_signal_handler(signal.SIGUSR1, self.toggle)
+        if config.PROFILE:
+            self.start()
+
+    def toggle(self):
+        # A start while the previous stop is still writing would have tracemalloc stopped under it
+        if self._stop_task is not None:
+            print("Profiler is still stopping, toggle ignored")
+            return
+        if self.enabled:
+            self._stop_task = self.loop.create_task(self.stop())
+        else:
+            self.start()
+
+    def start(self):
+        if self.enabled or self._stop_task is not None:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.enabled = True
+
+        # Leave tracemalloc running if someone else started it
+        self._owns_tracemalloc = not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start(config.PROFILE_TRACE_FRAMES)
+        self.first_snapshot = self.last_snapshot = self._snapshot()
+
+        self._sampler_stop.clear()
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._sampler.start()
+        self._tasks = [
+            self.loop.create_task(self._measure_lag()),
+            self.loop.create_task(self._dump_periodically())
+        ]
+        print(f"Profiling on, writing to {self.output_dir}")
+
+    async def stop(self):
+        # Already stopping from a toggle: wait for its results instead of stopping twice
+        if self._stop_task is not None and self._stop_task is not asyncio.current_task():
+            await self._stop_task
+            return
+        if not self.enabled:
+            return
+
+        try:
+            self.enabled = False
+            for task in self._tasks:
+                task.cancel()
+            self._sampler_stop.set()
+            await asyncio.to_thread(self._sampler.join)
+            await asyncio.to_thread(self.dump)
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+            print(f"Profiling off, results in {self.output_dir}")
+        finally:
+            self._stop_task = None
+
+    def record_state(self, **sizes):
+        """Latest sizes of long-lived session state, written with each memory snapshot."""
+        self.state = sizes
+
+    # ========= CPU SAMPLING ========= #
+
+    def _sample(self):
+        while not self._sampler_stop.wait(config.PROFILE_SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            subsystem = None
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                if subsystem is None:
+                    subsystem = self.subsystems.get(code)
+                frame = frame.f_back
+
+            if subsystem is None:
+                subsystem = "idle" if stack[0] == "selectors.py:select" else "other"
+
+            self.samples.setdefault(subsystem, Counter())[";".join(reversed(stack))] += 1
+
+    # ========= EVENT LOOP LAG ========= #
+
+    async def _measure_lag(self):
+        interval = config.PROFILE_LAG_INTERVAL
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.lags.append(time.perf_counter() - start - interval)
+
+    # ========= OUTPUT ========= #
+
+    async def _dump_periodically(self):
+        while True:
+            await asyncio.sleep(config.PROFILE_SNAPSHOT_INTERVAL)
+            await asyncio.to_thread(self.dump)
+
+    def dump(self):
+        now = datetime.now().strftime("%H:%M:%S")
+        self._dump_cpu()
+        self._dump_lag(now)
+        if tracemalloc.is_tracing():
+            self._dump_memory(now)
+
+    def _dump_cpu(self):
+        totals = []
+        for subsystem, stacks in list(self.samples.items()):
+            with open(os.path.join(self.output_dir, f"cpu_{subsystem}.folded"), "w") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            totals.append((subsystem, sum(stacks.values())))
+
+        total = sum(count for _, count in totals) or 1
+        with open(os.path.join(self.output_dir, "cpu_summary.txt"), "w") as f:
+            for subsystem, count in sorted(totals, key=lambda item: -item[1]):
+                f.write(f"{subsystem:<15} {count:>8} samples  {count / total * 100:5.1f}%\n")
+
+    def _dump_lag(self, now):
+        lags, self.lags = self.lags, []
+        if not lags:
+            return
+
+        path = os.path.join(self.output_dir, "loop_lag.csv")
+        is_new = not os.path.exists(path)
+        ms = np.array(lags) * 1000
+        with open(path, "a") as f:
+            if is_new:
+                f.write("time,samples,mean_ms,p99_ms,max_ms\n")
+            f.write(f"{now},{len(ms)},{ms.mean():.3f},{np.percentile(ms, 99):.3f},{ms.max():.3f}\n")
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__)
+        ])
+
+    def _dump_memory(self, now):
+        snapshot = self._snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        self.snapshot_count += 1
+
+        path = os.path.join(self.output_dir, f"memory_{self.snapshot_count:03d}.txt")
+        with open(path, "w") as f:
+            f.write(f"time: {now}\n")
+            f.write(f"traced: {current / 1e6:.2f} MB (peak {peak / 1e6:.2f} MB)\n")
+            for name, size in self.state.items():
+                f.write(f"{name}: {size}\n")
+
+            f.write(f"\n===== Top {config.PROFILE_TOP_STATS} growth since previous snapshot =====\n")
+            for stat in snapshot.compare_to(self.last_snapshot, "lineno")[:config.PROFILE_TOP_STATS]:
+                f.write(f"{stat}\n")
+
+            f.write(f"\n===== Top {config.PROFILE_TOP_STATS} growth since profiling started =====\n")
+            for stat in snapshot.compare_to(self.first_snapshot, "lineno")[:config.PROFILE_TOP_STATS]:
+                f.write(f"{stat}\n")
+
+        self.last_snapshot = snapshot
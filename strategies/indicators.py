@@ -1,30 +1,127 @@
+import time
+
 import pandas as pd
 import numpy as np
 
-def hullMA(df, length):
-
-    df = df.copy()
-    close = df["Close"]
-
+import config
+from data.compactBars import PRICE_COLUMNS, compactBars, pricePrecision, widenPrices
+
+# Indicators per higher timeframe (minutes -> calculateIndicators frame), refreshed by the
+# main loop when a timeframe closes a bar. Read it from calculateSignal().
+TIMEFRAME_INDICATORS = {}
+
+class SeriesCache:
+    """Named intermediate series for one bar set, computed once and memoized by parameters.
+
+    Indicators ask for the inputs they need with `cache.get(name, *params)`. Shared inputs
+    (close EWMs, true range, ATR, RSI up/down averages...) are only computed the first time
+    any indicator asks for them, so extra indicators or parameter variants reuse the work.
+    """
+
+    def __init__(self, df):
+        # Compact bars are float32 for storage only, the math always runs on the float64 prices
+        narrow = [col for col in PRICE_COLUMNS if col in df.columns and df[col].dtype == np.float32]
+        self.df = df.assign(**{col: widenPrices(df[col]) for col in narrow}) if narrow else df
+        self.series = {}
+
+    def get(self, name, *params):
+        key = (name, *params)
+        if key not in self.series:
+            self.series[key] = SERIES[name](self, *params)
+        return self.series[key]
+
+def _cacheFor(df, cache):
+    return SeriesCache(df) if cache is None else cache
+
+def _signalDtype(df):
+    # Compact bars (int64 nanosecond index) get int8 signals sharing the same index object
+    return np.int8 if df.index.dtype == np.int64 else np.int64
+
+def _signalSeries(df, value=0):
+    return pd.Series(value, index=df.index, dtype=_signalDtype(df))
+
+def _wma(series, l):
+    l = int(l)
+    weights = np.arange(1, l + 1)
+    values = series.to_numpy(dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) >= l:
+        # Same windows as rolling(l), any NaN in a window gives NaN
+        windows = np.lib.stride_tricks.sliding_window_view(values, l)
+        out[l - 1:] = windows @ weights / weights.sum()
+    return pd.Series(out, index=series.index)
+
+def _closeWma(cache, length):
+    return _wma(cache.df["Close"], length)
+
+def _hma(cache, length):
     length = int(length)
     half = length // 2
     sqrt_len = int(np.sqrt(length))
-
-    def wma(series, l):
-        l = int(l)
-        weights = np.arange(1, l + 1)
-        return series.rolling(l).apply(
-            lambda x: np.dot(x, weights) / weights.sum(),
-            raw=True
-        )
-
-    hma = wma(
-        2 * wma(close, half) - wma(close, length),
+    return _wma(
+        2 * cache.get("close_wma", half) - cache.get("close_wma", length),
         sqrt_len
     )
 
-    mhull = hma
-    shull = hma.shift(2)
+def _closeEwm(cache, span):
+    return cache.df['Close'].ewm(span=span, adjust=False).mean()
+
+def _trueRange(cache):
+    high = cache.df['High']
+    low = cache.df['Low']
+    close = cache.df['Close']
+    return pd.concat([
+        high - low,
+        (high - close.shift()).abs(),
+        (low - close.shift()).abs()
+    ], axis=1).max(axis=1)
+
+def _atr(cache, period):
+    return cache.get("true_range").rolling(period).mean()
+
+def _macdLine(cache, fast_length, slow_length):
+    return cache.get("close_ewm", fast_length) - cache.get("close_ewm", slow_length)
+
+def _macdSignal(cache, fast_length, slow_length, signal_length):
+    return cache.get("macd_line", fast_length, slow_length).ewm(span=signal_length, adjust=False).mean()
+
+def _delta(cache):
+    return cache.df['Close'].diff()
+
+def _up(cache):
+    return cache.get("delta").clip(lower=0)
+
+def _down(cache):
+    return -cache.get("delta").clip(upper=0)
+
+def _rma(cache, source, length):
+    return cache.get(source).ewm(alpha=1 / length, adjust=False).mean()
+
+def _rsi(cache, length):
+    rs = cache.get("rma", "up", length) / cache.get("rma", "down", length)
+    return 100 - (100 / (1 + rs))
+
+SERIES = {
+    "close_wma": _closeWma,
+    "hma": _hma,
+    "close_ewm": _closeEwm,
+    "true_range": _trueRange,
+    "atr": _atr,
+    "macd_line": _macdLine,
+    "macd_signal": _macdSignal,
+    "delta": _delta,
+    "up": _up,
+    "down": _down,
+    "rma": _rma,
+    "rsi": _rsi,
+}
+
+def hullMA(df, length, cache=None):
+
+    cache = _cacheFor(df, cache)
+
+    mhull = cache.get("hma", int(length))
+    shull = mhull.shift(2)
 
     signal = np.where(
         mhull.isna() | shull.isna(),
@@ -32,103 +129,114 @@ def hullMA(df, length):
         np.where(mhull > shull, 1, -1)
     )
 
-    df["HMA_SIGNAL"] = signal
-    return df[["HMA_SIGNAL"]]
+    return pd.DataFrame({"HMA_SIGNAL": signal.astype(_signalDtype(df))}, index=df.index)
 
-def emaCross(df, short_len, long_len):
+def emaCross(df, short_len, long_len, cache=None):
 
-    short_ema = df['Close'].ewm(span=short_len, adjust=False).mean()
-    long_ema = df['Close'].ewm(span=long_len, adjust=False).mean()
+    cache = _cacheFor(df, cache)
+    short_ema = cache.get("close_ewm", short_len)
+    long_ema = cache.get("close_ewm", long_len)
 
-    signal = pd.Series(0, index=df.index)
+    signal = _signalSeries(df)
     signal[(short_ema > long_ema) & (short_ema.shift(1) <= long_ema.shift(1))] = 1
     signal[(short_ema < long_ema) & (short_ema.shift(1) >= long_ema.shift(1))] = -1
     
     return signal
 
 
-def supertrend(df, atr_period, multiplier):
-
-    df = df.copy()
-    high = df['High']
-    low = df['Low']
-    close = df['Close']
-
-    tr = pd.concat([
-        high - low,
-        (high - close.shift()).abs(),
-        (low - close.shift()).abs()
-    ], axis=1).max(axis=1)
-
-    atr = tr.rolling(atr_period).mean()
-
-    stup = pd.Series(index=df.index, dtype=float)
-    dn = pd.Series(index=df.index, dtype=float)
-    sttrend = pd.Series(1, index=df.index)
-    signal = pd.Series(0, index=df.index)
+def supertrend(df, atr_period, multiplier, cache=None):
 
-    for i in range(len(df)):
-        if i == 0:
-            stup.iloc[i] = close.iloc[i] - multiplier * atr.iloc[i]
-            dn.iloc[i] = close.iloc[i] + multiplier * atr.iloc[i]
-            signal.iloc[i] = 0
-            continue
+    cache = _cacheFor(df, cache)
+    close = cache.df['Close'].to_numpy()
+    atr = cache.get("atr", atr_period).to_numpy(dtype=np.float64)
 
-        stup.iloc[i] = close.iloc[i] - multiplier * atr.iloc[i]
-        dn.iloc[i] = close.iloc[i] + multiplier * atr.iloc[i]
+    # Plain arrays instead of Series.iloc: the recursion is sequential, this keeps it cheap
+    stup = close - multiplier * atr
+    dn = close + multiplier * atr
+    sttrend = 1
+    signal = np.zeros(len(close), dtype=_signalDtype(df))
 
-        stup.iloc[i] = max(stup.iloc[i], stup.iloc[i-1]) if close.iloc[i-1] > stup.iloc[i-1] else stup.iloc[i]
-        dn.iloc[i] = min(dn.iloc[i], dn.iloc[i-1]) if close.iloc[i-1] < dn.iloc[i-1] else dn.iloc[i]
+    for i in range(1, len(close)):
+        if close[i-1] > stup[i-1]:
+            stup[i] = max(stup[i], stup[i-1])
+        if close[i-1] < dn[i-1]:
+            dn[i] = min(dn[i], dn[i-1])
 
-        prev_trend = sttrend.iloc[i-1]
-        if prev_trend == -1 and close.iloc[i] > dn.iloc[i-1]:
-            sttrend.iloc[i] = 1
-        elif prev_trend == 1 and close.iloc[i] < stup.iloc[i-1]:
-            sttrend.iloc[i] = -1
-        else:
-            sttrend.iloc[i] = prev_trend
+        if sttrend == -1 and close[i] > dn[i-1]:
+            sttrend = 1
+        elif sttrend == 1 and close[i] < stup[i-1]:
+            sttrend = -1
 
-        signal.iloc[i] = 1 if sttrend.iloc[i] == 1 else -1
+        signal[i] = sttrend
 
-    return pd.DataFrame({"SUPER_TREND_SIGNAL": signal})
+    return pd.DataFrame({"SUPER_TREND_SIGNAL": signal}, index=df.index)
 
-def macd(df, fast_length, slow_length, signal_length):
-    df = df.copy()
-    src = df['Close']
+def macd(df, fast_length, slow_length, signal_length, cache=None):
 
+    cache = _cacheFor(df, cache)
+    macd_line = cache.get("macd_line", fast_length, slow_length)
+    signal_line = cache.get("macd_signal", fast_length, slow_length, signal_length)
 
-    fast_ma = src.ewm(span=fast_length, adjust=False).mean()
-    slow_ma = src.ewm(span=slow_length, adjust=False).mean()
-    macd_line = fast_ma - slow_ma
-    signal_line = macd_line.ewm(span=signal_length, adjust=False).mean()
-
-    signal = pd.Series(0, index=df.index)
+    signal = _signalSeries(df)
     signal[macd_line > signal_line] = 1
     signal[macd_line < signal_line] = -1
 
     return pd.DataFrame({"MACD_SIGNAL": signal})
 
-def rsi(df, length, long_level, short_level):
-
-    df = df.copy()
-    src = df['Close']
+def rsi(df, length, long_level, short_level, cache=None):
 
-    delta = src.diff()
+    cache = _cacheFor(df, cache)
+    rsi = cache.get("rsi", length)
 
-    up = delta.clip(lower=0)
-    down = -delta.clip(upper=0)
-
-    alpha = 1 / length
-    up_ema = up.ewm(alpha=alpha, adjust=False).mean()
-    down_ema = down.ewm(alpha=alpha, adjust=False).mean()
-
-    rs = up_ema / down_ema
-    rsi = 100 - (100 / (1 + rs))
-
-    signal = pd.Series(0, index=df.index)
+    signal = _signalSeries(df)
     signal[rsi <= long_level] = 1
     signal[rsi >= short_level] = -1
 
     return pd.DataFrame({"RSI_SIGNAL": signal})
 
-
+def calculateIndicators(df, cache=None):
+    """Every indicator with the config parameters, sharing one SeriesCache for the bar set."""
+
+    cache = _cacheFor(df, cache)
+
+    return pd.concat([
+        df,
+        hullMA(df, config.HMA_PERIOD, cache),
+        emaCross(df, config.EMA_SHORT_PERIOD, config.EMA_LONG_PERIOD, cache).rename("EMA_SIGNAL"),
+        supertrend(df, config.SUPERTREND_ATR_PERIOD, config.SUPERTREND_MULTIPLIER, cache),
+        macd(df, config.MACD_FAST_LENGTH, config.MACD_SLOW_LENGTH, config.MACD_SIGNAL_LENGTH, cache),
+        rsi(df, config.RSI_PERIOD, config.RSI_LONG, config.RSI_SHORT, cache)
+    ], axis=1)
+
+def compactReport(df):
+    """Precision, memory and speed of the compact path compared to the float64 path.
+
+    Run it on a real session (e.g. candleHist with COMPACT_MODE off) before turning
+    COMPACT_MODE on: the signal mismatch counts should all be 0.
+    """
+    compact_df = compactBars(df)
+
+    start = time.perf_counter()
+    full = calculateIndicators(df)
+    full_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compact = calculateIndicators(compact_df)
+    compact_time = time.perf_counter() - start
+
+    signal_cols = [col for col in full.columns if col.endswith("_SIGNAL")]
+    mismatches = {
+        col: int((full[col].to_numpy() != compact[col].to_numpy()).sum())
+        for col in signal_cols
+    }
+
+    return {
+        "price_error": pricePrecision(df).to_dict(),
+        "signal_mismatches": mismatches,
+        "bars_bytes": int(df.memory_usage(deep=True).sum()),
+        "compact_bars_bytes": int(compact_df.memory_usage(deep=True).sum()),
+        "signals_bytes": int(full[signal_cols].memory_usage(deep=True).sum()),
+        "compact_signals_bytes": int(compact[signal_cols].memory_usage(deep=True).sum()),
+        "indicators_seconds": full_time,
+        "compact_indicators_seconds": compact_time,
+    }